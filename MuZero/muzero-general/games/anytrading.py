@@ -1,50 +1,130 @@
 # Применение библиотеки gym-anytrading
-import gym-anytrading
-import gym
+import argparse
+import os
+import tempfile
 
-from stable_baselines.common.vec_env import DummyVecEnv
+import pkg_resources
+from gym_anytrading.envs import StocksEnv
+
+from stable_baselines.common.vec_env import SubprocVecEnv
 from stable_baselines import A2C
 
 import numpy as np
 import pandas as pd
-from matlotlib import pyplot as plt
-
-# Bring in Marketwatch GME Data
-df = pd.read_csv('data/gme data.csv')
-
-df['Date'] = pd.to_datetime(df['Date'])
- env = gym.make('stocks-v0', df=df, frame_bound=(5, 100), window_size=5)
- # env.signal_features
- state = env.reset()
- while True:
-     action = env.action.sample()
-	 n_state, reward, done, info = env.step(action)
-	 if done:
-	     print("info", info)
-		 break
-plt.figure(figsize=(15,6))         		 
-plt.cla()
-env.render_all()
-plt.show()
-# Build Environment and Train
-env_maker = lambda: gym.make('stacks-v0', df=df. frame_bound=(5, 100), window_size=5)
-env = DummyVecEnv([env_maker])
-
-model = A2C('MlpLstmPolicy', env, verbose=1)
-model.learn(total_timesteps=100000)
-# Evaluation
-env = gym.make('stocks-v0', df=df, frame_bound=(90, 110), window_size=5)
-obs = env.reset()
-while True:
-    obs = obs[np.newaxis, ...]
-	action, _states = model.predict(obs)
-	obs, rewards, done, info = env.step(action)
-	if done:
-	    print("info", info)
-		break
-
-plt.figure(figsize=(15,6))         		 
-plt.cla()
-env.render_all()
-plt.show()		
+from numpy.lib.stride_tricks import sliding_window_view
+from matplotlib import pyplot as plt
+
+DATA_FILE = 'data/gme data.csv'
+PRICES_FILE = 'data/gme_close.npy'
+
+# WindowedStocksEnv reproduces the observation slicing of this gym-anytrading release (gym API, 4-tuple step),
+# which is the one that works with stable-baselines.
+GYM_ANYTRADING_VERSION = '1.2.0'
+_installed_version = pkg_resources.get_distribution('gym-anytrading').version
+if _installed_version != GYM_ANYTRADING_VERSION:
+    raise ImportError(f"anytrading.py requires gym-anytrading=={GYM_ANYTRADING_VERSION}, found {_installed_version}.")
+
+
+def load_close_prices(csv_file=DATA_FILE, cache_file=PRICES_FILE):
+    """
+    Memory-map the float32 Close prices. The CSV is only parsed when the .npy cache is missing or outdated,
+    every other process maps the same file and shares its pages through the OS page cache.
+    If only the .npy cache is available, it is used as is.
+    """
+    if not os.path.exists(cache_file) or \
+            (os.path.exists(csv_file) and os.path.getmtime(cache_file) < os.path.getmtime(csv_file)):
+        df = pd.read_csv(csv_file)
+
+        # Write next to the cache and atomically swap it in, so no process ever maps a partially written file.
+        fd, tmp_file = tempfile.mkstemp(suffix='.npy', dir=os.path.dirname(cache_file) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, df['Close'].to_numpy(dtype=np.float32))
+            os.replace(tmp_file, cache_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+    return np.load(cache_file, mmap_mode='r')
+
+
+class WindowedStocksEnv(StocksEnv):
+    """
+    stocks-v0 environment that serves observations from a precomputed sliding-window view over a contiguous
+    float32 feature array, instead of slicing the signal features on every step.
+    """
+
+    def __init__(self, prices, window_size, frame_bound):
+        # TradingEnv expects a 2D table, pass the (memory-mapped) Close prices as a single column view.
+        super().__init__(prices[:, np.newaxis], window_size, frame_bound)
+        self.df = None  # Prices are materialized in NumPy, drop the reference to the source table.
+
+    def _process_data(self):
+        prices = np.asarray(self.df[self.frame_bound[0] - self.window_size:self.frame_bound[1], 0], dtype=np.float32)
+
+        diff = np.insert(np.diff(prices), 0, 0)
+        signal_features = np.column_stack((prices, diff))
+
+        # windows[i] == signal_features[i:i + window_size], a strided view that does not copy any data.
+        self.windows = sliding_window_view(signal_features, self.window_size, axis=0).swapaxes(1, 2)
+
+        return prices, signal_features
+
+    def _get_observation(self):
+        # Equivalent to TradingEnv (gym-anytrading 1.2.0): signal_features[(current_tick - window_size):current_tick]
+        return self.windows[self._current_tick - self.window_size]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train an A2C agent on gym-anytrading stocks-v0.")
+    parser.add_argument("--num-envs", type=int, default=4,
+                        help="Number of environments stepped in parallel subprocesses during training")
+    args = parser.parse_args()
+
+    # Bring in Marketwatch GME Data
+    prices = load_close_prices()
+
+    env = WindowedStocksEnv(prices=prices, frame_bound=(5, 100), window_size=5)
+    # env.signal_features
+    state = env.reset()
+    while True:
+        action = env.action_space.sample()
+        n_state, reward, done, info = env.step(action)
+        if done:
+            print("info", info)
+            break
+    plt.figure(figsize=(15, 6))
+    plt.cla()
+    env.render_all()
+    plt.show()
+
+    # Build Environment and Train. Every env instance steps in its own subprocess; observations are batched.
+    # Subprocesses map the price file themselves instead of receiving a pickled copy of the array.
+    env_maker = lambda: WindowedStocksEnv(prices=load_close_prices(), frame_bound=(5, 100), window_size=5)
+    # A single env is stepped in-process, spawning a worker subprocess would only add IPC overhead.
+    env = env_maker() if args.num_envs == 1 else SubprocVecEnv([env_maker for _ in range(args.num_envs)])
+
+    model = A2C('MlpLstmPolicy', env, verbose=1)
+    model.learn(total_timesteps=100000)
+    env.close()
+
+    # Evaluation
+    env = WindowedStocksEnv(prices=prices, frame_bound=(90, 110), window_size=5)
+    obs = env.reset()
+    # Recurrent policies expect a batch of num_envs observations, only the first row is evaluated.
+    obs_batch = np.zeros((args.num_envs,) + env.observation_space.shape, dtype=np.float32)
+    # Carry the LSTM state between steps, otherwise every prediction starts from the initial state.
+    _states = None
+    dones = np.zeros(args.num_envs, dtype=bool)
+    while True:
+        obs_batch[0] = obs
+        action, _states = model.predict(obs_batch, state=_states, mask=dones)
+        obs, rewards, done, info = env.step(action[0])
+        dones[0] = done
+        if done:
+            print("info", info)
+            break
 
+    plt.figure(figsize=(15, 6))
+    plt.cla()
+    env.render_all()
+    plt.show()
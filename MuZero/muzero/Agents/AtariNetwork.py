@@ -55,10 +55,10 @@ class AlphaZeroAtariNetwork:
 
         fc = self.crafter.dense_sequence(1, flat)
 
-        pi = Dense(self.action_size, activation='softmax', name='pi')(fc)
-        v = Dense(1, activation='tanh', name='v')(fc) \
+        pi = Dense(self.action_size, activation='softmax', name='pi', dtype='float32')(fc)
+        v = Dense(1, activation='tanh', name='v', dtype='float32')(fc) \
             if self.args.support_size == 0 else \
-            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v')(fc)
+            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v', dtype='float32')(fc)
 
         return pi, v
 
@@ -126,17 +126,18 @@ class MuZeroAtariNetwork:
         flat = Flatten()(latent_state)
         latent_state = MinMaxScaler()(latent_state)
 
-        r = Dense(self.args.support_size * 2 + 1, name='r')(flat)
+        r = Dense(self.args.support_size * 2 + 1, name='r', dtype='float32')(flat)
         if not self.args.support_size:
-            r = Activation('softmax')(r)
+            r = Activation('softmax', dtype='float32')(r)
 
         return r, latent_state
 
     def build_predictor(self, latent_state):
         out_tensor = self.crafter.build_conv_block(latent_state, use_bn=False)
 
-        pi = Dense(self.action_size, activation='softmax', name='pi')(out_tensor)
-        v = Dense(self.args.support_size * 2 + 1, name='v')(out_tensor)
-        v = Activation('softmax')(v) if self.args.support_size else Activation('tanh')(v)
+        pi = Dense(self.action_size, activation='softmax', name='pi', dtype='float32')(out_tensor)
+        v = Dense(self.args.support_size * 2 + 1, name='v', dtype='float32')(out_tensor)
+        v = Activation('softmax', dtype='float32')(v) if self.args.support_size else \
+            Activation('tanh', dtype='float32')(v)
 
         return pi, v
@@ -45,10 +45,10 @@ class AlphaZeroGymNetwork:
     def build_predictor(self, observations):
         fc_sequence = self.crafter.dense_sequence(self.args.num_dense, observations)
 
-        pi = Dense(self.action_size, activation='softmax', name='pi')(fc_sequence)
-        v = Dense(1, activation='linear', name='v')(fc_sequence) \
+        pi = Dense(self.action_size, activation='softmax', name='pi', dtype='float32')(fc_sequence)
+        v = Dense(1, activation='linear', name='v', dtype='float32')(fc_sequence) \
             if self.args.support_size == 0 else \
-            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v')(fc_sequence)
+            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v', dtype='float32')(fc_sequence)
 
         return pi, v
 
@@ -95,7 +95,7 @@ class MuZeroGymNetwork:
 
         latent_state = Dense(self.latents, activation='linear', name='s_0')(fc_sequence)
         latent_state = Activation('tanh')(latent_state) if self.latents <= 3 else MinMaxScaler()(latent_state)
-        latent_state = Reshape((self.latents, 1))(latent_state)
+        latent_state = Reshape((self.latents, 1), dtype='float32')(latent_state)
 
         return latent_state  # 2-dimensional 1-time step latent state. (Encodes history of images into one state).
 
@@ -105,28 +105,28 @@ class MuZeroGymNetwork:
 
         latent_state = Dense(self.latents, activation='linear', name='s_next')(fc_sequence)
         latent_state = Activation('tanh')(latent_state) if self.latents <= 3 else MinMaxScaler()(latent_state)
-        latent_state = Reshape((self.latents, 1))(latent_state)
+        latent_state = Reshape((self.latents, 1), dtype='float32')(latent_state)
 
-        r = Dense(1, activation='linear', name='r')(fc_sequence) \
+        r = Dense(1, activation='linear', name='r', dtype='float32')(fc_sequence) \
             if self.args.support_size == 0 else \
-            Dense(self.args.support_size * 2 + 1, activation='softmax', name='r')(fc_sequence)
+            Dense(self.args.support_size * 2 + 1, activation='softmax', name='r', dtype='float32')(fc_sequence)
 
         return r, latent_state
 
     def build_predictor(self, latent_state):
         fc_sequence = self.crafter.dense_sequence(self.args.num_dense, latent_state)
 
-        pi = Dense(self.action_size, activation='softmax', name='pi')(fc_sequence)
-        v = Dense(1, activation='linear', name='v')(fc_sequence) \
+        pi = Dense(self.action_size, activation='softmax', name='pi', dtype='float32')(fc_sequence)
+        v = Dense(1, activation='linear', name='v', dtype='float32')(fc_sequence) \
             if self.args.support_size == 0 else \
-            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v')(fc_sequence)
+            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v', dtype='float32')(fc_sequence)
 
         return pi, v
 
     def build_decoder(self, latent_state):
         fc_sequence = self.crafter.dense_sequence(self.args.num_dense, latent_state)
 
-        out = Dense(self.x * self.y * self.planes, name='o_k')(fc_sequence)
-        o = Reshape((self.x, self.y, self.planes))(out)
+        out = Dense(self.x * self.y * self.planes, name='o_k', dtype='float32')(fc_sequence)
+        o = Reshape((self.x, self.y, self.planes), dtype='float32')(out)
         return o
 
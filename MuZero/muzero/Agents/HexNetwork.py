@@ -46,10 +46,10 @@ class AlphaZeroHexNetwork:
 
         fc = self.crafter.dense_sequence(1, flat)
 
-        pi = Dense(self.action_size, activation='softmax', name='pi')(fc)
-        v = Dense(1, activation='tanh', name='v')(fc) \
+        pi = Dense(self.action_size, activation='softmax', name='pi', dtype='float32')(fc)
+        v = Dense(1, activation='tanh', name='v', dtype='float32')(fc) \
             if self.args.support_size == 0 else \
-            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v')(fc)
+            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v', dtype='float32')(fc)
 
         return pi, v
 
@@ -117,8 +117,8 @@ class MuZeroHexNetwork:
         flat = Flatten()(latent_state)
 
         # Cancel gradient/ predictions as r is not trained in boardgames.
-        r = Dense(self.args.support_size * 2 + 1, name='r')(flat)
-        r = Lambda(lambda x: x * 0)(r)
+        r = Dense(self.args.support_size * 2 + 1, name='r', dtype='float32')(flat)
+        r = Lambda(lambda x: x * 0, dtype='float32')(r)
 
         return r, latent_state
 
@@ -132,10 +132,10 @@ class MuZeroHexNetwork:
 
         fc = self.crafter.dense_sequence(1, flat)
 
-        pi = Dense(self.action_size, activation='softmax', name='pi')(fc)
-        v = Dense(1, activation='tanh', name='v')(fc) \
+        pi = Dense(self.action_size, activation='softmax', name='pi', dtype='float32')(fc)
+        v = Dense(1, activation='tanh', name='v', dtype='float32')(fc) \
             if self.args.support_size == 0 else \
-            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v')(fc)
+            Dense(self.args.support_size * 2 + 1, activation='softmax', name='v', dtype='float32')(fc)
 
         return pi, v
 
@@ -144,6 +144,6 @@ class MuZeroHexNetwork:
         res = self.crafter.conv_residual_tower(self.args.num_towers, conv,
                                                self.args.residual_left, self.args.residual_right, use_bn=False)
 
-        o = Conv2D(self.planes * self.args.observation_length, 3, padding='same')(res)
+        o = Conv2D(self.planes * self.args.observation_length, 3, padding='same', dtype='float32')(res)
 
         return o
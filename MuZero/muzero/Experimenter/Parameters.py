@@ -1,35 +1,47 @@
 """
 This file provides functionality to train multiple unique agents over varying hyperparameter configurations.
-All agents are trained asynchronously using a thread pool with the allocated number of threads.
+All agents are trained asynchronously as subprocesses managed by a single asyncio event loop, at most the
+allocated number of jobs run concurrently.
+
+Requires Python 3.7+ (asyncio.run). On Windows the proactor event loop is selected explicitly, as the selector
+loop (the default before Python 3.8) does not support subprocesses.
 """
 from __future__ import annotations
 import os
+import sys
 import typing
-import time
-from concurrent.futures.thread import ThreadPoolExecutor
-import subprocess as sp
+import copy
+import asyncio
+import tempfile
 from datetime import datetime
 
-import numpy as np
-
 from utils import DotDict
 from utils.experimenter_utils import get_gpu_memory
 from .experimenter import ExperimentConfig
 
 
 class AblationAnalysis:
+    # Default VRAM (MiB) reserved per training run when dividing GPUs into job slots.
+    DEFAULT_JOB_MEMORY = 2048
 
-    def __init__(self, experiment: ExperimentConfig, config_dir: str = './temp/') -> None:
+    def __init__(self, experiment: ExperimentConfig, config_dir: typing.Optional[str] = None) -> None:
         """
         Initialize experiment by assigning dependent variables.
         :param experiment: ExperimentConfig Contains the grid of hyperparameters to test out.
         :param config_dir: str Specifies destination of temporary files specifying ModelConfig JSONs.
+                           If None, a temporary directory is created that is removed on exit, or at a normal
+                           interpreter shutdown after an exception. It remains if the process is killed.
         """
         self.experiment = experiment
+
+        self._tmp = None
+        if config_dir is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix='ablation_')
+            config_dir = self._tmp.name
         self.config_dir = config_dir
 
-        self.configs = list()
         self.files = list()
+        self.gpu_slots = list()
 
     def __enter__(self) -> AblationAnalysis:
         """
@@ -40,13 +52,17 @@ class AblationAnalysis:
         if not os.path.exists(self.config_dir):
             os.makedirs(self.config_dir)
 
-        # First construct all possible hyperparameter configuration JSON contents.
-        self.configs = list()
+        # Poll VRAM once and divide every GPU into job slots, unless the device is fixed by the flags (e.g., CPU).
+        self.gpu_slots = list()
+        if '--gpu' not in self.experiment.experiment_args.flags:
+            job_memory = self.experiment.experiment_args.get('gpu_job_memory', self.DEFAULT_JOB_MEMORY)
+            for gpu, memory in enumerate(get_gpu_memory()):
+                print(f"GPU {gpu} has {memory} MiB available VRAM.")
+                self.gpu_slots += [(gpu, slot) for slot in range(max(1, memory // job_memory))]
+            self.gpu_slots.sort(key=lambda gpu_slot: gpu_slot[1])  # Interleave slots to spread jobs over GPUs.
+
+        # Only the base configuration and the grid overrides are kept, variants are materialized one at a time below.
         base_config = DotDict.from_json(self.experiment.ablation_base.config)
-        for param in self.experiment.ablation_grid:
-            config = base_config.copy()
-            config.recursive_update(param)
-            self.configs.append(config)
 
         # Save ablation analysis configuration using time annotation.
         dt = datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -55,8 +71,9 @@ class AblationAnalysis:
 
         # Store/ generate all unique JSON config files annotated by time and repetition number.
         for run in range(self.experiment.experiment_args.num_repeat):
-            for i, config in enumerate(self.configs):
-                c = config.copy()  # Note: shallow copy.
+            for i, param in enumerate(self.experiment.ablation_grid):
+                c = copy.deepcopy(base_config)
+                c.recursive_update(param)
 
                 run_config_name = f'rep{run}_config{i}_dt{dt}'
                 c.name = f'{c.name}_{run_config_name}'
@@ -77,53 +94,74 @@ class AblationAnalysis:
 
     def run(self):
         """ Start training runs for all generated ModelConfig JSON files asynchronously through shell commands. """
-        execute = True
-
-        def start_run(config: str, flags: str) -> None:
-            """ Wrapper function to start training session from a console command. """
-            if execute:
-                gpu_memory = get_gpu_memory()
-                gpu = np.argmax(gpu_memory)
-                print(f"Best GPU to use: {gpu} with {gpu_memory[gpu]} MiB available VRAM.")
-
-                cmd = f'python Main.py train -c {config} {flags} '
-                if '--gpu' not in cmd:  # If CUDA should not be used (CPU) --> set '--cpu -1' in config flags.
-                    cmd += f'--gpu {gpu}'
-
-                print(f"Starting a run: {cmd}")
-                sp.call(cmd.split())
-
         num_threads = self.experiment.experiment_args.n_jobs
-        print(f'Constructing ThreadPool. Queue size: {len(self.files)} jobs, using {num_threads} threads')
+        flags = self.experiment.experiment_args.flags
+
+        # Divide the CPU over concurrent runs and let each run only claim the VRAM it needs.
+        base_env = os.environ.copy()
+        base_env['TF_NUM_INTRAOP_THREADS'] = str(max(1, (os.cpu_count() or 1) // num_threads))
+        base_env['TF_NUM_INTEROP_THREADS'] = '2'
+        base_env['TF_FORCE_GPU_ALLOW_GROWTH'] = 'true'
+
+        async def start_run(config: str, slots: asyncio.Semaphore, gpus: asyncio.Queue) -> None:
+            """ Coroutine to start a training session from a console command and wait for it to finish. """
+            async with slots:
+                gpu_slot = (await gpus.get()) if self.gpu_slots else None
+                try:
+                    # The config path is passed as a single argument, it may contain spaces (e.g., in TMPDIR).
+                    cmd = ['python', 'Main.py', 'train', '-c', config, *flags.split()]
+                    env = base_env.copy()
+                    if gpu_slot is not None:  # If CUDA should not be used (CPU) --> set '--gpu -1' in config flags.
+                        env['CUDA_VISIBLE_DEVICES'] = str(gpu_slot[0])  # Visible as device 0 (default of --gpu).
+
+                    devices = env.get('CUDA_VISIBLE_DEVICES', '')
+                    print(f"Starting a run: {' '.join(cmd)} (CUDA_VISIBLE_DEVICES={devices})")
+                    proc = await asyncio.create_subprocess_exec(*cmd, env=env)
+                    try:
+                        await proc.wait()
+                    finally:
+                        if proc.returncode is None:  # Cancelled (KeyboardInterrupt) --> terminate the child as well.
+                            proc.terminate()
+                            await proc.wait()
+                finally:
+                    if gpu_slot is not None:  # Hand the GPU slot over to the next queued job.
+                        gpus.put_nowait(gpu_slot)
+
+        async def run_all() -> None:
+            """ Schedule all jobs on the event loop, the semaphore bounds the number of concurrent runs. """
+            slots, gpus = asyncio.Semaphore(num_threads), asyncio.Queue()
+            for gpu_slot in self.gpu_slots:
+                gpus.put_nowait(gpu_slot)
+
+            await asyncio.gather(*(start_run(file, slots, gpus) for file in self.files))
+
+        print(f'Starting event loop. Queue size: {len(self.files)} jobs, running {num_threads} concurrently')
+
+        if sys.platform == 'win32':  # Only the proactor event loop supports subprocesses on Windows.
+            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
         try:
-            tp = ThreadPoolExecutor(max_workers=num_threads)
-            job = list()
-            for file in self.files:
-                time.sleep(1)  # Give threads some time to start up and select GPU.
-                job.append(tp.submit(start_run, file, self.experiment.experiment_args.flags))
-
-            while not all(j.done() for j in job):
-                time.sleep(1)
-
+            asyncio.run(run_all())
         except KeyboardInterrupt:
-            print("Keyboard Interrupt. Giving workers time to terminate.")
-            execute = False
-
-            time.sleep(1)
-            print("Workers have exited.")
+            # asyncio.run cancels all pending tasks on exit, which terminates their subprocesses.
+            print("Keyboard Interrupt. Workers have been terminated.")
 
         print('All processes have exited.')
 
     def __exit__(self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any) -> None:
         """ When exiting the context manager, remove all temporary files and (optionally) the temporary folder. """
+        if self._tmp is not None:  # Directory is owned by us, remove it along with all its content.
+            self._tmp.cleanup()
+            return
+
         # Remove every used temporary file.
         for file in self.files:
             os.remove(file)
 
         # Remove dir if not used for other purposes
-        if not os.listdir(self.config_dir):
-            os.rmdir(self.config_dir)
+        with os.scandir(self.config_dir) as entries:
+            if next(entries, None) is None:
+                os.rmdir(self.config_dir)
 
 
 def run_ablations(experiment: ExperimentConfig) -> None:
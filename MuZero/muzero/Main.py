@@ -10,6 +10,7 @@ from tensorflow.python.client import device_lib
 import utils.debugging as debugger
 from utils.debugging import *
 from utils.storage import DotDict
+from utils.network_utils import set_precision_policy
 from utils.game_utils import DiscretizeAction
 
 from AlphaZero.AlphaCoach import AlphaZeroCoach
@@ -144,7 +145,7 @@ if __name__ == "__main__":
 
     player_choices = ["manual", "random", "deterministic", "muzero", "alphazero"]
     play_parser = mode_parsers.add_parser("play")
-    play_parser.set_defaults(mode="play", debug=True, render=True, lograte=0, gpu=0)
+    play_parser.set_defaults(mode="play", debug=True, render=True, lograte=0, gpu=0, precision="float32")
     play_parser.add_argument("--p1", choices=player_choices, default="manual", help="Player one")
     play_parser.add_argument("--p1_config", choices=player_choices, default=None, help="Config file for player one")
     play_parser.add_argument("--p2", choices=player_choices, default="manual", help="Player two")
@@ -168,6 +169,9 @@ if __name__ == "__main__":
         p.add_argument("--gpu", default=0, help="Set which device to use (-1 for CPU). Equivalent "
                                                 "to/overrides the CUDA_VISIBLE_DEVICES environment variable.")
         p.add_argument("--run_name", default=False, help="Override the run name (will not be timestamped!)")
+        p.add_argument("--precision", choices=["float32", "mixed_float16", "mixed_bfloat16"], default="float32",
+                       help="Keras dtype policy of the neural networks. mixed_bfloat16 requires native hardware "
+                            "support (e.g., Ampere GPUs), mixed_float16 uses loss scaling.")
 
     args = parser.parse_args()
     # END Console arguments handling.
@@ -177,6 +181,9 @@ if __name__ == "__main__":
     debugger.RENDER = args.render
     debugger.LOG_RATE = args.lograte
 
+    # The dtype policy must be set before any neural network is constructed.
+    set_precision_policy(args.precision)
+
     # Split up pipeline based on arguments
     if args.mode == "train":
 
@@ -13,7 +13,7 @@ from abc import ABC, abstractmethod
 import tensorflow as tf
 import numpy as np
 
-from utils import DotDict
+from utils import DotDict, network_utils
 from utils.loss_utils import scalar_loss, scale_gradient, safe_l2norm
 from utils.debugging import MuZeroMonitor
 
@@ -50,6 +50,19 @@ class MuZeroNeuralNet(ABC):
         else:
             raise NotImplementedError(f"Optimization method {self.net_args.optimizer.method} not implemented...")
 
+        # FP16 gradients underflow without loss scaling. BF16 shares the exponent range of FP32 and needs none.
+        self.loss_scaling = (network_utils.PRECISION_POLICY == 'mixed_float16')
+        if self.loss_scaling:
+            self.optimizer = tf.keras.mixed_precision.LossScaleOptimizer(self.optimizer)
+
+    def scale_loss(self, loss: tf.Tensor) -> tf.Tensor:
+        """ Scale the loss before differentiation if loss scaling is enabled, see unscale_gradients. """
+        return self.optimizer.get_scaled_loss(loss) if self.loss_scaling else loss
+
+    def unscale_gradients(self, gradients: typing.List) -> typing.List:
+        """ Undo the scaling of gradients computed from a loss that was scaled by scale_loss. """
+        return self.optimizer.get_unscaled_gradients(gradients) if self.loss_scaling else gradients
+
     @tf.function
     def unroll(self, observations: tf.Tensor, actions: tf.Tensor) -> \
             typing.List[typing.Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]]:
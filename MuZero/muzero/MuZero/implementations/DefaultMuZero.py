@@ -89,8 +89,9 @@ class DefaultMuZero(MuZeroNeuralNet):
         # Track the gradient through unrolling and loss computation and perform an optimization step.
         with GradientTape() as tape:
             loss, step_losses = self.loss_function(*data)
+            scaled_loss = self.scale_loss(loss)
 
-        grads = tape.gradient(loss, self.get_variables())
+        grads = self.unscale_gradients(tape.gradient(scaled_loss, self.get_variables()))
         self.optimizer.apply_gradients(zip(grads, self.get_variables()), name=f'MuZeroDefault_{self.architecture}')
 
         # Logging
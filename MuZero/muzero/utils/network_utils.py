@@ -1,13 +1,37 @@
 """
 This file defines a Keras Layer to min-max normalize neuron activations sample-wise.
-Additionally, this file defines a helper class for constructing neural network substructures.
+Additionally, this file defines a helper class for constructing neural network substructures and a function
+to (optionally) build all networks with mixed precision.
 """
 import typing
 
-import numpy as np
-from keras.layers import Layer, LeakyReLU, Activation, BatchNormalization, Dropout, Conv2D, Dense, Flatten, Lambda
+from keras.layers import Layer, LeakyReLU, Activation, BatchNormalization, Dropout, Conv2D, Dense, Flatten, Add
 from keras import backend as k
 
+# Keras dtype policy of all networks, see set_precision_policy. Networks are built in FP32 by default.
+PRECISION_POLICY = 'float32'
+
+
+def set_precision_policy(policy: str = 'float32') -> None:
+    """
+    Set the global Keras dtype policy for all networks that are constructed afterwards.
+    'mixed_float16' and 'mixed_bfloat16' compute activations in reduced precision while keeping FP32 variables.
+    Note that bfloat16 is only fast on hardware with native support (e.g., Ampere GPUs or newer), float16 requires
+    loss scaling which is handled by the MuZero optimizer (see MuNeuralNet).
+    :param policy: str One of 'float32', 'mixed_float16' or 'mixed_bfloat16'.
+    :raises: NotImplementedError if mixed precision is requested on a Keras version without support (< 2.4).
+    """
+    global PRECISION_POLICY
+
+    if policy != 'float32':
+        try:
+            from keras import mixed_precision
+            mixed_precision.set_global_policy(policy)
+        except (ImportError, AttributeError):
+            raise NotImplementedError(f"Precision policy '{policy}' requires a tf.keras based Keras version (>= 2.4).")
+
+    PRECISION_POLICY = policy
+
 
 class MinMaxScaler(Layer):
     """
@@ -24,23 +48,22 @@ class MinMaxScaler(Layer):
         """
         super().__init__()
         self.epsilon = epsilon
-        self.shape = tuple()
-
-    def build(self, input_shape: np.ndarray) -> None:
-        """ Initialize shapes within the computation graph """
-        self.shape = input_shape
 
     def call(self, inputs, **kwargs) -> typing.Callable:
         """
         MinMax normalize the given inputs with minimum value 1 / dimensions.
         Normalization is performed strictly over one example (not a batch).
+        The normalization is computed and returned in FP32 as it is numerically sensitive to reduced precision.
+        Both reductions run over one flattened (batch, features) view, so no per-call axis list is constructed.
         :param inputs: Data tensor.
         :return: Sample-wise MinMax normalized tensor.
         """
-        tensor_min = k.min(inputs, axis=np.arange(1, len(self.shape)), keepdims=True)
-        tensor_max = k.max(inputs, axis=np.arange(1, len(self.shape)), keepdims=True)
+        flat = k.reshape(k.cast(inputs, 'float32'), (k.shape(inputs)[0], -1))
+        tensor_min = k.min(flat, axis=1, keepdims=True)
+        tensor_max = k.max(flat, axis=1, keepdims=True)
 
-        return (inputs - tensor_min) / (tensor_max - tensor_min + self.epsilon)
+        result = (flat - tensor_min) / (tensor_max - tensor_min + self.epsilon)
+        return k.reshape(result, k.shape(inputs))
 
 
 class Crafter:
@@ -54,10 +77,10 @@ class Crafter:
                                    if args.activation != "leakyrelu" else LeakyReLU(alpha=0.2))
 
     def conv_residual_tower(self, n: int, x, left_n: int = 2, right_n: int = 0, use_bn: bool = True):
-        """ Recursively build a (convolutional) residual tower of height n, with branches left_n and right_n. """
+        """ Build a (convolutional) residual tower of height n, with branches left_n and right_n. """
         assert left_n > 0, "Residual network must have at least a conv block larger than 0."
 
-        if n > 0:
+        for _ in range(n):
             left = self.conv_tower(left_n - 1, x, use_bn)
             if left_n - 1 > 0:
                 left = (Conv2D(self.args.num_channels, 3, padding='same', use_bias=(not use_bn))(left))
@@ -70,28 +93,24 @@ class Crafter:
                 if use_bn:
                     right = BatchNormalization()(right)
 
-            # TODO: Create GitHub Issue: Add layer produces NameError in tf graph. Equivalent Lambda K.sum does work.
-            merged = Lambda(lambda var: k.sum(var, axis=0))([left, right])
-            out_tensor = self.activation()(merged)
-
-            return self.conv_residual_tower(n - 1, out_tensor, left_n, right_n, use_bn)
+            merged = Add()([left, right])
+            x = self.activation()(merged)
 
         return x
 
     def conv_tower(self, n: int, x, use_bn: bool = True):
-        """ Recursively builds a convolutional tower of height n. """
-        if n > 0:
-            tensor = Conv2D(self.args.num_channels, 3, padding='same', use_bias=(not use_bn))(x)
+        """ Build a convolutional tower of height n. """
+        for _ in range(n):
+            x = Conv2D(self.args.num_channels, 3, padding='same', use_bias=(not use_bn))(x)
             if use_bn:
-                tensor = BatchNormalization()(tensor)
-            return self.conv_tower(n - 1, self.activation()(tensor), use_bn)
+                x = BatchNormalization()(x)
+            x = self.activation()(x)
         return x
 
     def dense_sequence(self, n: int, x):
-        """ Recursively builds a Fully Connected sequence of length n. """
-        if n > 0:
-            return self.dense_sequence(n - 1, Dropout(self.args.dropout)(self.activation()(
-                Dense(self.args.size_dense)(x))))
+        """ Build a Fully Connected sequence of length n. """
+        for _ in range(n):
+            x = Dropout(self.args.dropout)(self.activation()(Dense(self.args.size_dense)(x)))
         return x
 
     def build_conv_block(self, tensor_in, use_bn: bool = True):
@@ -3,6 +3,7 @@ Simple extension to a dictionary to access keys with a '.key' syntax instead of
 """
 from __future__ import annotations
 import typing
+import copy
 
 
 class DotDict(dict):
@@ -37,11 +38,29 @@ class DotDict(dict):
             new[k] = v.copy() if isinstance(v, DotDict) else v
         return new
 
+    def __deepcopy__(self, memo: typing.Dict) -> DotDict:
+        """
+        Recursively copy all elements, including lists and other mutable containers, within the data container.
+        Required as copy.deepcopy would otherwise look up '__deepcopy__' as a dictionary key.
+        :return: DotDict Deep copy of self
+        """
+        return DotDict({k: copy.deepcopy(v, memo) for k, v in self.items()})
+
     def to_json(self, file: str) -> None:
-        """ Dump data as a JSON to the specified file """
-        import json
-        with open(file, 'w') as f:
-            json.dump(self, f)
+        """
+        Dump data as a JSON to the specified file, uses orjson if it is installed.
+        Note that non-finite floats are not valid JSON: orjson writes NaN/inf as null whereas the json fallback
+        writes NaN/Infinity. Both are read back by from_json, but as None and float('nan')/float('inf') respectively.
+        """
+        try:
+            import orjson
+        except ImportError:
+            import json
+            with open(file, 'w') as f:
+                json.dump(self, f)
+        else:
+            with open(file, 'wb') as f:
+                f.write(orjson.dumps(self, option=orjson.OPT_NON_STR_KEYS))  # Cast e.g. int keys like json.
 
     def recursive_update(self, other: DotDict) -> None:
         """